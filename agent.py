@@ -1 +0,0 @@
-#number of audio samples per second
\ No newline at end of file
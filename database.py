@@ -1,11 +1,88 @@
 import sqlite3
 import datetime
+import queue
+import threading
+from contextlib import contextmanager
 
 DB_NAME = "appointments.db"
+POOL_SIZE = 4
+
+# Hot-path SQL as module constants: identical string objects on every call
+# keep sqlite3's per-connection statement cache hitting, skipping re-parse
+# and re-plan on the pooled connections.
+SQL_INSERT_BOOKING = 'INSERT INTO bookings (customer_name, booking_time) VALUES (?, ?)'
+SQL_GET_BOOKING = 'SELECT * FROM bookings WHERE id = ?'
+SQL_CHECK_AVAILABILITY = 'SELECT 1 FROM bookings INDEXED BY idx_bookings_time WHERE booking_time = ? LIMIT 1'
+SQL_ALL_BOOKINGS = 'SELECT * FROM bookings'
+
+# Small pool of long-lived connections so each booking call reuses SQLite's
+# page cache instead of paying connect + PRAGMA setup every time.
+_pool = queue.Queue(maxsize=POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_ready = False
+
+def _configure(conn):
+    """Apply per-connection PRAGMA tuning (WAL-friendly settings)."""
+    # journal_mode/synchronous persist in the DB file, but busy_timeout,
+    # temp_store and cache_size are per-connection and must be re-applied.
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=5000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+
+def _new_connection():
+    # check_same_thread=False: connections are handed out by the pool and may
+    # be used from worker threads; the queue ensures one user at a time.
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False, cached_statements=256)
+    _configure(conn)
+    return conn
+
+def init_pool():
+    """Pre-open the pool connections. Safe to call more than once."""
+    global _pool_ready
+    with _pool_lock:
+        if _pool_ready:
+            return
+        for _ in range(POOL_SIZE):
+            _pool.put(_new_connection())
+        _pool_ready = True
+
+def close_pool():
+    """Close all pooled connections (e.g. on server shutdown)."""
+    global _pool_ready
+    with _pool_lock:
+        while not _pool.empty():
+            try:
+                conn = _pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.execute('PRAGMA optimize')
+            conn.close()
+        _pool_ready = False
+
+@contextmanager
+def get_connection():
+    """Borrow a pooled connection, returning it when the block exits."""
+    if not _pool_ready:
+        init_pool()
+    conn = _pool.get()
+    try:
+        yield conn
+    finally:
+        # A failed statement (e.g. the IntegrityError on a double booking)
+        # leaves an open implicit transaction holding the write lock; roll it
+        # back so the pooled connection comes back clean.
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put(conn)
 
 def init_db():
     """Initialize the database with the bookings table."""
     conn = sqlite3.connect(DB_NAME)
+    # WAL lets readers proceed while a write is in flight, so availability
+    # checks don't block on bookings happening mid-call.
+    conn.execute('PRAGMA journal_mode=WAL')
+    _configure(conn)
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS bookings (
@@ -15,19 +92,23 @@ def init_db():
             status TEXT DEFAULT 'confirmed'
         )
     ''')
+    # Explicit BINARY-collated index so availability checks are a single
+    # index-only B-tree probe regardless of table size.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bookings_time
+        ON bookings(booking_time COLLATE BINARY)
+    ''')
     conn.commit()
     conn.close()
 
 def add_booking(customer_name, booking_time):
     """Add a new booking to the database."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO bookings (customer_name, booking_time) VALUES (?, ?)', 
-                       (customer_name, booking_time))
-        conn.commit()
-        booking_id = cursor.lastrowid
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_INSERT_BOOKING, (customer_name, booking_time))
+            conn.commit()
+            booking_id = cursor.lastrowid
         return {"success": True, "booking_id": booking_id, "message": "Booking confirmed."}
     except sqlite3.IntegrityError:
         return {"success": False, "message": "Slot already booked."}
@@ -36,11 +117,10 @@ def add_booking(customer_name, booking_time):
 
 def get_booking(booking_id):
     """Retrieve booking details by ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM bookings WHERE id = ?', (booking_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_GET_BOOKING, (booking_id,))
+        row = cursor.fetchone()
     if row:
         return {
             "id": row[0],
@@ -52,20 +132,18 @@ def get_booking(booking_id):
 
 def check_availability(booking_time):
     """Check if a slot is available."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute('SELECT 1 FROM bookings WHERE booking_time = ?', (booking_time,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_CHECK_AVAILABILITY, (booking_time,))
+        row = cursor.fetchone()
     return row is None
 
 def get_all_bookings():
     """Get all bookings (for debugging/listing)."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM bookings')   
-    rows = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_ALL_BOOKINGS)
+        rows = cursor.fetchall()
     return [
         {"id": r[0], "customer_name": r[1], "booking_time": r[2], "status": r[3]}
         for r in rows
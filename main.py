@@ -1,20 +1,81 @@
 import asyncio
 import base64
+import binascii
 import json
+import logging
 import os
+import orjson
 import websockets
+from collections import deque
 from fastapi import FastAPI, WebSocket, Request, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from dotenv import load_dotenv
 from pharmacy_functions import FUNCTION_MAP as PHARMACY_MAP
 from meeting_functions import FUNCTION_MAP as MEETING_MAP
+import database
 
 FUNCTION_MAP = {**PHARMACY_MAP, **MEETING_MAP}
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def startup():
+    database.init_db()
+    database.init_pool()
+
+@app.on_event("shutdown")
+async def shutdown():
+    database.close_pool()
+
+class SPSCAudioRing:
+    """Single-producer single-consumer ring of fixed-size audio frames.
+
+    Cheaper than asyncio.Queue for the twilio_receiver -> sts_sender handoff:
+    one shared Event instead of a Future allocated per get, and all frame
+    slots live in one preallocated buffer. On overflow the oldest frame is
+    dropped — stale live audio is worthless anyway.
+    """
+
+    def __init__(self, capacity=64, frame_size=20 * 160):
+        self._frame_size = frame_size
+        self._capacity = capacity
+        self._view = memoryview(bytearray(capacity * frame_size))
+        self._head = 0  # next slot to read
+        self._tail = 0  # next slot to write
+        self._count = 0
+        self._data_ready = asyncio.Event()
+
+    def put_nowait(self, frame):
+        if self._count == self._capacity:
+            self._head = (self._head + 1) % self._capacity
+            self._count -= 1
+        start = self._tail * self._frame_size
+        self._view[start:start + self._frame_size] = frame
+        self._tail = (self._tail + 1) % self._capacity
+        self._count += 1
+        self._data_ready.set()
+
+    def get_nowait(self):
+        if self._count == 0:
+            raise asyncio.QueueEmpty
+        start = self._head * self._frame_size
+        frame = bytes(self._view[start:start + self._frame_size])
+        self._head = (self._head + 1) % self._capacity
+        self._count -= 1
+        if self._count == 0:
+            self._data_ready.clear()
+        return frame
+
+    async def get(self):
+        while self._count == 0:
+            self._data_ready.clear()
+            await self._data_ready.wait()
+        return self.get_nowait()
+
 def sts_connect():
     api_key = os.getenv("DEEPGRAM_API_KEY")
     if not api_key:
@@ -32,46 +93,59 @@ def load_config():
     with open("config.json", "r") as f:
         return json.load(f)
 
+# Parse and serialize the Deepgram config once at import time; every call
+# sends the same settings, so there is no reason to re-read the file per
+# connection. Kept as str: a binary frame would be treated as audio.
+_CONFIG_MESSAGE = json.dumps(load_config())
+
 async def handle_barge_in(decoded, twilio_ws: WebSocket, streamsid):
     if decoded["type"] == "UserStartedSpeaking":
         clear_message = {
             "event": "clear",
             "streamSid": streamsid
         }
-        await twilio_ws.send_text(json.dumps(clear_message))
+        await twilio_ws.send_text(orjson.dumps(clear_message).decode())
 
-def execute_function_call(func_name , arguments):
+async def execute_function_call(func_name , arguments):
     if func_name in FUNCTION_MAP:
-         result = FUNCTION_MAP[func_name](**arguments)
-         print(f"Function call result : {result}")
+         # Booking functions hit sqlite3 synchronously; run them on a worker
+         # thread so a contended DB write can't stall audio forwarding.
+         result = await asyncio.to_thread(FUNCTION_MAP[func_name], **arguments)
+         if logger.isEnabledFor(logging.DEBUG):
+             logger.debug("Function call result : %s", result)
          return result
     else:
         result = {"error" : f"unknown function: {func_name}"}
-        print(result)
+        logger.warning("unknown function: %s", func_name)
         return result
 
 def create_function_call_response(func_id, func_name ,result):
-    return {
+    # Deepgram expects content as a JSON string, so the result is encoded once
+    # with orjson and the envelope is serialized in the same pass; callers
+    # send the returned string as-is instead of re-serializing the dict.
+    return orjson.dumps({
         "type": "FunctionCallResponse",
         "id": func_id,
         "name": func_name,
-        "content": json.dumps(result)
-    }
+        "content": orjson.dumps(result).decode()
+    }).decode()
 
 async def handle_function_call_request(decoded,sts_ws):
     try:
         for function_call in decoded["functions"]:
             func_name = function_call["name"]
             func_id = function_call["id"]
-            arguments = json.loads(function_call["arguments"])
+            arguments = orjson.loads(function_call["arguments"])
             
-            print(f"Function call:{func_name} (ID:{func_id}), arguments: {arguments}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Function call:%s (ID:%s), arguments: %s", func_name, func_id, arguments)
+
+            result = await execute_function_call(func_name, arguments)
 
-            result = execute_function_call(func_name, arguments)
-            
             function_result = create_function_call_response(func_id, func_name, result)
-            await sts_ws.send(json.dumps(function_result))
-            print(f"sent function result: {function_result}")
+            await sts_ws.send(function_result)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("sent function result: %s", function_result)
            
     except Exception as e:
         print(f"error calling function: {e}")
@@ -80,7 +154,7 @@ async def handle_function_call_request(decoded,sts_ws):
             func_name if "func_name" in locals() else "unknown",
             result={"error": f"Function call failed with: {str(e)}"}
         )
-        await sts_ws.send(json.dumps(error_reult))
+        await sts_ws.send(error_reult)
 
 
 async def handle_text_message(decoded, twilio_ws: WebSocket, sts_ws, streamsid):
@@ -91,59 +165,108 @@ async def handle_text_message(decoded, twilio_ws: WebSocket, sts_ws, streamsid):
 
 async def sts_sender(sts_ws, audio_queue):
     print("sts_sender started")
+    # Coalesce whatever has queued up (capped at 4 frames) into one send so a
+    # backlog costs one websocket frame + TLS record instead of one per chunk.
+    # Deepgram's input side is size-agnostic, so concatenated mulaw is fine.
+    MAX_BATCH = 4 * 20 * 160
     while True:
         chunk = await audio_queue.get()
-        await sts_ws.send(chunk)
+        buf = bytearray(chunk)
+        while len(buf) < MAX_BATCH:
+            try:
+                buf.extend(audio_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        await sts_ws.send(bytes(buf))
 
 async def sts_receiver(sts_ws, twilio_ws: WebSocket, streamsid_queue):
     print("sts_receiver started")
     streamsid = await streamsid_queue.get()
 
+    # The streamSid is constant for the life of the stream, so bind the JSON
+    # prefix/suffix once and splice only the base64 payload per frame.
+    media_prefix = ('{"event":"media","streamSid":"%s","media":{"payload":"'
+                    % streamsid).encode("ascii")
+    media_suffix = b'"}}'
+
     async for message in sts_ws:
         if type(message) is str:
-            decoded = json.loads(message)
-            print(f"Received message type: {decoded.get('type')}")
+            decoded = orjson.loads(message)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received message type: %s", decoded.get("type"))
             await handle_text_message(decoded, twilio_ws, sts_ws, streamsid)
             continue
         
         raw_mulaw = message
 
-        media_message = {
-            "event": "media",
-            "streamSid": streamsid,
-            "media": {"payload": base64.b64encode(raw_mulaw).decode("ascii")}
-        }
-        await twilio_ws.send_text(json.dumps(media_message))
+        # base64 output is pure ASCII, so the media JSON is pure concatenation
+        # here. Twilio requires a text frame, hence the final ascii decode.
+        media_message = media_prefix + base64.b64encode(raw_mulaw) + media_suffix
+        await twilio_ws.send_text(media_message.decode("ascii"))
 
 async def twilio_receiver(twilio_ws: WebSocket, audio_queue, streamsid_queue):
     BUFFER_SIZE = 20 * 160
-    inbuffer = bytearray(b"")
+    # Inbound chunks are queued as-is and stitched into fixed-size frames on
+    # demand; the old single bytearray paid an O(remaining) copy on every
+    # inbuffer[BUFFER_SIZE:] reassignment.
+    pending = deque()
+    pending_len = 0
+
+    # Dict dispatch keeps the dominant "media" path to one lookup per message
+    # instead of walking an if/elif chain. Handlers close over the local
+    # buffering state; returning True stops the receive loop.
+    def on_start(data):
+        print("get our streamsid")
+        streamsid_queue.put_nowait(data["start"]["streamSid"])
+
+    def on_media(data):
+        nonlocal pending_len
+        media = data["media"]
+        # a2b_base64 is b64decode minus the wrapper/validation layer;
+        # CPython has no decode-into API, but the decoded chunk goes
+        # straight into the deque so this is the only copy made.
+        chunk = binascii.a2b_base64(media["payload"])
+        if media["track"] == "inbound":
+            pending.append(chunk)
+            pending_len += len(chunk)
+
+    def on_stop(data):
+        return True
+
+    def on_noop(data):
+        pass
+
+    handlers = {"start": on_start, "media": on_media, "stop": on_stop}
 
     try:
         while True:
-            message = await twilio_ws.receive_text()
-            data = json.loads(message)
-            event = data["event"]
-
-            if event == "start":
-                print("get our streamsid")
-                start = data["start"]
-                streamsid = start["streamSid"]
-                streamsid_queue.put_nowait(streamsid)
-            elif event == "connected":
-                continue
-            elif event == "media":
-                media = data["media"]
-                chunk = base64.b64decode(media["payload"])
-                if media["track"] == "inbound":
-                    inbuffer.extend(chunk)
-            elif event == "stop":
+            # Raw receive() hands back the frame as sent; orjson.loads accepts
+            # bytes directly, so we skip receive_text()'s UTF-8 decode of a
+            # payload that gets scanned again by the JSON parser anyway.
+            message = await twilio_ws.receive()
+            if message["type"] == "websocket.disconnect":
+                print("Twilio disconnected")
+                break
+            data = orjson.loads(message.get("bytes") or message["text"])
+
+            if handlers.get(data["event"], on_noop)(data):
                 break
 
-            while len(inbuffer) >= BUFFER_SIZE:
-                chunk = inbuffer[:BUFFER_SIZE]
-                audio_queue.put_nowait(chunk)
-                inbuffer = inbuffer[BUFFER_SIZE:]
+            while pending_len >= BUFFER_SIZE:
+                frame = bytearray(BUFFER_SIZE)
+                view = memoryview(frame)
+                filled = 0
+                while filled < BUFFER_SIZE:
+                    chunk = pending.popleft()
+                    take = min(len(chunk), BUFFER_SIZE - filled)
+                    view[filled:filled + take] = chunk[:take]
+                    filled += take
+                    if take < len(chunk):
+                        pending.appendleft(chunk[take:])
+                pending_len -= BUFFER_SIZE
+                # The ring copies into its own slab, so hand over the
+                # bytearray as-is instead of snapshotting it to bytes first.
+                audio_queue.put_nowait(frame)
     except WebSocketDisconnect:
         print("Twilio disconnected")
     except Exception as e:
@@ -173,14 +296,13 @@ async def handle_media_stream(websocket: WebSocket):
     await websocket.accept()
     print("Twilio connected to media stream")
 
-    audio_queue = asyncio.Queue()
+    audio_queue = SPSCAudioRing()
     streamsid_queue = asyncio.Queue()
 
     try:
         async with sts_connect() as sts_ws:
             print("Connected to Deepgram")
-            config_message = load_config()
-            await sts_ws.send(json.dumps(config_message))
+            await sts_ws.send(_CONFIG_MESSAGE)
             print("Sent config to Deepgram")
 
             await asyncio.gather(
@@ -198,4 +320,6 @@ async def handle_media_stream(websocket: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    # uvloop + httptools: faster event loop and HTTP parsing for the purely
+    # IO-bound websocket relay; no API changes.
+    uvicorn.run(app, host="0.0.0.0", port=5000, loop="uvloop", http="httptools", ws="websockets")
\ No newline at end of file
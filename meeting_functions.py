@@ -1,24 +1,43 @@
 import database
-from datetime import datetime
+import re
 
 # Ensure DB is initialized
 database.init_db()
 
+# Precompiled validation for 'YYYY-MM-DD HH:MM'; strptime is an order of
+# magnitude slower and these run inside the agent's function-call path.
+_TIME_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2})$")
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+def _valid_booking_time(booking_time):
+    """Return True if booking_time is a real 'YYYY-MM-DD HH:MM' timestamp."""
+    m = _TIME_RE.match(booking_time)
+    if not m:
+        return False
+    year, month, day, hour, minute = map(int, m.groups())
+    if not (1 <= month <= 12 and hour <= 23 and minute <= 59):
+        return False
+    days = _DAYS_IN_MONTH[month - 1]
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        days = 29
+    return 1 <= day <= days
+
 def book_meeting(customer_name, booking_time):
     """
     Book a meeting slot.
     booking_time should be in format 'YYYY-MM-DD HH:MM'
     """
     # Validate time format
-    try:
-        datetime.strptime(booking_time, "%Y-%m-%d %H:%M")
-    except ValueError:
+    if not _valid_booking_time(booking_time):
         return {"error": "Invalid time format. Please use YYYY-MM-DD HH:MM"}
 
-    if not database.check_availability(booking_time):
-        return {"error": f"Slot {booking_time} is already booked."}
-    
+    # No pre-check: the UNIQUE constraint on booking_time makes the insert
+    # atomic, so a single round-trip both checks and books the slot.
     result = database.add_booking(customer_name, booking_time)
+    if not result.get("success"):
+        return {"error": f"Slot {booking_time} is already booked."
+                if result.get("message") == "Slot already booked."
+                else result.get("message", "Booking failed.")}
     return result
 
 def check_availability(booking_time):
@@ -26,9 +45,7 @@ def check_availability(booking_time):
     Check if a slot is available.
     booking_time should be in format 'YYYY-MM-DD HH:MM'
     """
-    try:
-        datetime.strptime(booking_time, "%Y-%m-%d %H:%M")
-    except ValueError:
+    if not _valid_booking_time(booking_time):
         return {"error": "Invalid time format. Please use YYYY-MM-DD HH:MM"}
 
     is_available = database.check_availability(booking_time)